@@ -0,0 +1,93 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Native divergence-theorem kernel for binary STL payloads.
+
+Decodes facets straight from the raw byte buffer, transposes them once
+into nine contiguous SoA coordinate streams and hands those to the
+kernel in ``_stl_simd.h``, which processes eight facets per iteration
+with AVX2/FMA when the build host supports it (scalar otherwise). No
+Python objects are created per facet. Build in place with:
+
+    python setup.py build_ext --inplace
+
+The pure-Python/NumPy paths in :mod:`stl_volume` remain the fallback
+when this extension has not been built.
+
+Author: Fersch 3D quoting engine
+"""
+
+from libc.float cimport FLT_MAX
+from libc.stdlib cimport free, malloc
+
+
+cdef extern from "_stl_simd.h":
+    void fersch_volume_bbox_soa(
+        const float* v1x, const float* v1y, const float* v1z,
+        const float* v2x, const float* v2y, const float* v2z,
+        const float* v3x, const float* v3y, const float* v3z,
+        size_t n, double* vol_out, float* bounds) nogil
+
+
+def volume_and_bbox(const unsigned char[::1] buf, Py_ssize_t num_tri):
+    """Compute signed volume (mm3) and bounds of a binary STL buffer.
+
+    Args:
+        buf: The full file contents, header included.
+        num_tri: Number of facets to read; the caller is expected to
+            clamp it to what the buffer actually holds.
+
+    Returns:
+        ``(volume_mm3, min_x, min_y, min_z, max_x, max_y, max_z)``.
+    """
+    cdef double vol = 0.0
+    cdef float bounds[6]
+    cdef float* streams
+    cdef float* v1x
+    cdef float* v1y
+    cdef float* v1z
+    cdef float* v2x
+    cdef float* v2y
+    cdef float* v2z
+    cdef float* v3x
+    cdef float* v3y
+    cdef float* v3z
+    cdef const float* p
+    cdef Py_ssize_t i, n = num_tri
+
+    bounds[0] = bounds[1] = bounds[2] = FLT_MAX
+    bounds[3] = bounds[4] = bounds[5] = -FLT_MAX
+    if n <= 0:
+        return 0.0, bounds[0], bounds[1], bounds[2], bounds[3], bounds[4], bounds[5]
+
+    streams = <float*> malloc(9 * n * sizeof(float))
+    if streams == NULL:
+        raise MemoryError()
+    v1x = streams
+    v1y = streams + n
+    v1z = streams + 2 * n
+    v2x = streams + 3 * n
+    v2y = streams + 4 * n
+    v2z = streams + 5 * n
+    v3x = streams + 6 * n
+    v3y = streams + 7 * n
+    v3z = streams + 8 * n
+    try:
+        with nogil:
+            # AoS -> SoA: one strided pass turns the misaligned 50-byte
+            # records into unit-stride streams the SIMD loop can load.
+            for i in range(n):
+                p = <const float*> &buf[84 + 50 * i + 12]
+                v1x[i] = p[0]; v1y[i] = p[1]; v1z[i] = p[2]
+                v2x[i] = p[3]; v2y[i] = p[4]; v2z[i] = p[5]
+                v3x[i] = p[6]; v3y[i] = p[7]; v3z[i] = p[8]
+            fersch_volume_bbox_soa(
+                v1x, v1y, v1z, v2x, v2y, v2z, v3x, v3y, v3z,
+                <size_t> n, &vol, bounds)
+    finally:
+        free(streams)
+
+    return (
+        vol / 6.0,
+        bounds[0], bounds[1], bounds[2],
+        bounds[3], bounds[4], bounds[5],
+    )
@@ -0,0 +1,188 @@
+/*
+ * SIMD kernel for the fersch3d STL volume/bbox reduction.
+ *
+ * Operates on nine contiguous SoA coordinate streams (v1x..v3z). When
+ * the translation unit is compiled with AVX2+FMA (-march=native on a
+ * capable host), eight facets are processed per iteration with
+ * _mm256_fmadd_ps; otherwise a plain scalar loop is used, so the
+ * extension builds everywhere.
+ *
+ * Author: Fersch 3D quoting engine
+ */
+
+#ifndef FERSCH_STL_SIMD_H
+#define FERSCH_STL_SIMD_H
+
+#include <float.h>
+#include <stddef.h>
+
+#if defined(__AVX2__) && defined(__FMA__)
+
+#include <immintrin.h>
+
+static double fersch_hsum256(__m256 v)
+{
+    float t[8];
+    double s = 0.0;
+    int k;
+    _mm256_storeu_ps(t, v);
+    for (k = 0; k < 8; k++)
+        s += t[k];
+    return s;
+}
+
+static float fersch_hmin256(__m256 v)
+{
+    float t[8];
+    float m;
+    int k;
+    _mm256_storeu_ps(t, v);
+    m = t[0];
+    for (k = 1; k < 8; k++)
+        if (t[k] < m)
+            m = t[k];
+    return m;
+}
+
+static float fersch_hmax256(__m256 v)
+{
+    float t[8];
+    float m;
+    int k;
+    _mm256_storeu_ps(t, v);
+    m = t[0];
+    for (k = 1; k < 8; k++)
+        if (t[k] > m)
+            m = t[k];
+    return m;
+}
+
+/* bounds: min_x, min_y, min_z, max_x, max_y, max_z */
+static void fersch_volume_bbox_soa(
+    const float *v1x, const float *v1y, const float *v1z,
+    const float *v2x, const float *v2y, const float *v2z,
+    const float *v3x, const float *v3y, const float *v3z,
+    size_t n, double *vol_out, float *bounds)
+{
+    __m256 vol8 = _mm256_setzero_ps();
+    __m256 minx = _mm256_set1_ps(FLT_MAX), miny = minx, minz = minx;
+    __m256 maxx = _mm256_set1_ps(-FLT_MAX), maxy = maxx, maxz = maxx;
+    double vol = 0.0;
+    float min_x = FLT_MAX, min_y = FLT_MAX, min_z = FLT_MAX;
+    float max_x = -FLT_MAX, max_y = -FLT_MAX, max_z = -FLT_MAX;
+    size_t i = 0;
+
+    for (; i + 8 <= n; i += 8) {
+        __m256 ax = _mm256_loadu_ps(v1x + i);
+        __m256 ay = _mm256_loadu_ps(v1y + i);
+        __m256 az = _mm256_loadu_ps(v1z + i);
+        __m256 bx = _mm256_loadu_ps(v2x + i);
+        __m256 by = _mm256_loadu_ps(v2y + i);
+        __m256 bz = _mm256_loadu_ps(v2z + i);
+        __m256 cx = _mm256_loadu_ps(v3x + i);
+        __m256 cy = _mm256_loadu_ps(v3y + i);
+        __m256 cz = _mm256_loadu_ps(v3z + i);
+        /* v2 x v3 */
+        __m256 cpx = _mm256_fmsub_ps(by, cz, _mm256_mul_ps(bz, cy));
+        __m256 cpy = _mm256_fmsub_ps(bz, cx, _mm256_mul_ps(bx, cz));
+        __m256 cpz = _mm256_fmsub_ps(bx, cy, _mm256_mul_ps(by, cx));
+        /* vol += v1 . (v2 x v3), eight lanes at once */
+        vol8 = _mm256_fmadd_ps(
+            ax, cpx, _mm256_fmadd_ps(ay, cpy, _mm256_fmadd_ps(az, cpz, vol8)));
+        minx = _mm256_min_ps(minx, _mm256_min_ps(ax, _mm256_min_ps(bx, cx)));
+        miny = _mm256_min_ps(miny, _mm256_min_ps(ay, _mm256_min_ps(by, cy)));
+        minz = _mm256_min_ps(minz, _mm256_min_ps(az, _mm256_min_ps(bz, cz)));
+        maxx = _mm256_max_ps(maxx, _mm256_max_ps(ax, _mm256_max_ps(bx, cx)));
+        maxy = _mm256_max_ps(maxy, _mm256_max_ps(ay, _mm256_max_ps(by, cy)));
+        maxz = _mm256_max_ps(maxz, _mm256_max_ps(az, _mm256_max_ps(bz, cz)));
+    }
+
+    vol = fersch_hsum256(vol8);
+    min_x = fersch_hmin256(minx);
+    min_y = fersch_hmin256(miny);
+    min_z = fersch_hmin256(minz);
+    max_x = fersch_hmax256(maxx);
+    max_y = fersch_hmax256(maxy);
+    max_z = fersch_hmax256(maxz);
+
+    /* Scalar tail for the last n % 8 facets */
+    for (; i < n; i++) {
+        float ax = v1x[i], ay = v1y[i], az = v1z[i];
+        float bx = v2x[i], by = v2y[i], bz = v2z[i];
+        float cx = v3x[i], cy = v3y[i], cz = v3z[i];
+        vol += ax * (by * cz - bz * cy)
+             + ay * (bz * cx - bx * cz)
+             + az * (bx * cy - by * cx);
+        if (ax < min_x) min_x = ax;
+        if (bx < min_x) min_x = bx;
+        if (cx < min_x) min_x = cx;
+        if (ay < min_y) min_y = ay;
+        if (by < min_y) min_y = by;
+        if (cy < min_y) min_y = cy;
+        if (az < min_z) min_z = az;
+        if (bz < min_z) min_z = bz;
+        if (cz < min_z) min_z = cz;
+        if (ax > max_x) max_x = ax;
+        if (bx > max_x) max_x = bx;
+        if (cx > max_x) max_x = cx;
+        if (ay > max_y) max_y = ay;
+        if (by > max_y) max_y = by;
+        if (cy > max_y) max_y = cy;
+        if (az > max_z) max_z = az;
+        if (bz > max_z) max_z = bz;
+        if (cz > max_z) max_z = cz;
+    }
+
+    *vol_out = vol;
+    bounds[0] = min_x; bounds[1] = min_y; bounds[2] = min_z;
+    bounds[3] = max_x; bounds[4] = max_y; bounds[5] = max_z;
+}
+
+#else /* scalar build without AVX2+FMA */
+
+static void fersch_volume_bbox_soa(
+    const float *v1x, const float *v1y, const float *v1z,
+    const float *v2x, const float *v2y, const float *v2z,
+    const float *v3x, const float *v3y, const float *v3z,
+    size_t n, double *vol_out, float *bounds)
+{
+    double vol = 0.0;
+    float min_x = FLT_MAX, min_y = FLT_MAX, min_z = FLT_MAX;
+    float max_x = -FLT_MAX, max_y = -FLT_MAX, max_z = -FLT_MAX;
+    size_t i;
+
+    for (i = 0; i < n; i++) {
+        float ax = v1x[i], ay = v1y[i], az = v1z[i];
+        float bx = v2x[i], by = v2y[i], bz = v2z[i];
+        float cx = v3x[i], cy = v3y[i], cz = v3z[i];
+        vol += ax * (by * cz - bz * cy)
+             + ay * (bz * cx - bx * cz)
+             + az * (bx * cy - by * cx);
+        if (ax < min_x) min_x = ax;
+        if (bx < min_x) min_x = bx;
+        if (cx < min_x) min_x = cx;
+        if (ay < min_y) min_y = ay;
+        if (by < min_y) min_y = by;
+        if (cy < min_y) min_y = cy;
+        if (az < min_z) min_z = az;
+        if (bz < min_z) min_z = bz;
+        if (cz < min_z) min_z = cz;
+        if (ax > max_x) max_x = ax;
+        if (bx > max_x) max_x = bx;
+        if (cx > max_x) max_x = cx;
+        if (ay > max_y) max_y = ay;
+        if (by > max_y) max_y = by;
+        if (cy > max_y) max_y = cy;
+        if (az > max_z) max_z = az;
+        if (bz > max_z) max_z = bz;
+        if (cz > max_z) max_z = cz;
+    }
+
+    *vol_out = vol;
+    bounds[0] = min_x; bounds[1] = min_y; bounds[2] = min_z;
+    bounds[3] = max_x; bounds[4] = max_y; bounds[5] = max_z;
+}
+
+#endif /* __AVX2__ && __FMA__ */
+
+#endif /* FERSCH_STL_SIMD_H */
@@ -28,24 +28,190 @@ Author: Fersch 3D quoting engine
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import re
+import string
 import sys
+import tempfile
 from argparse import ArgumentParser
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from starlette.responses import RedirectResponse
 
 from .quote_engine import QuoteEngine
-from .stl_volume import compute_volume_ml, compute_volume_and_bbox
+from .stl_volume import compute_volume_ml, compute_volume_and_bbox, warm_up
+
+
+# HTML templates are compiled once at import time. The option lists are
+# precomputed on the QuoteEngine, so rendering a page is a single
+# Template.substitute call instead of rebuilding the markup per request.
+FORM_TEMPLATE = string.Template("""
+<html>
+  <head>
+    <title>Devis Fersch 3D</title>
+    <style>
+      body { font-family: Arial, sans-serif; background: #f5f5f5; padding: 2rem; }
+      .container { max-width: 600px; margin: auto; background: white; padding: 1rem 2rem; border-radius: 8px; box-shadow: 0 2px 6px rgba(0,0,0,0.1); }
+      h1 { text-align: center; }
+      label { display: block; margin-top: 1rem; }
+      input, select { width: 100%; padding: 0.5rem; margin-top: 0.25rem; }
+      button { margin-top: 1rem; padding: 0.75rem; width: 100%; background: #FAC900; border: none; border-radius: 4px; font-size: 1rem; cursor: pointer; }
+    </style>
+  </head>
+  <body>
+    <div class="container">
+      <h1>Demande de devis</h1>
+      <form action="/quote" method="post" enctype="multipart/form-data">
+        <label>Fichier STL</label>
+        <input type="file" name="stlfile" accept=".stl,.obj" required />
+
+        <label>Matière</label>
+        <select name="material">$material_options</select>
+
+        <label>Type de pièce</label>
+        <select name="type_piece">$type_options</select>
+
+        <label>Typologie</label>
+        <select name="typology">$typology_options</select>
+
+        <label>Quantité</label>
+        <input type="number" name="quantity" value="1" min="1" />
+
+        <label>Mode de livraison</label>
+        <select name="shipping">
+          <option value="retrait">Retrait gratuit</option>
+          <option value="livraison">Livraison (supplément)</option>
+        </select>
+
+        <button type="submit">Obtenir mon devis</button>
+      </form>
+    </div>
+  </body>
+</html>
+""")
+
+RESULT_TEMPLATE = string.Template("""
+<html><head><title>Votre devis</title><style>
+body { font-family: Arial, sans-serif; background: #f5f5f5; padding: 2rem; }
+.container { max-width: 600px; margin: auto; background: white; padding: 1rem 2rem; border-radius: 8px; box-shadow: 0 2px 6px rgba(0,0,0,0.1); }
+h1 { text-align: center; }
+table { width: 100%; border-collapse: collapse; margin-top: 1rem; }
+td { padding: 0.5rem; border-bottom: 1px solid #ddd; }
+td:first-child { font-weight: bold; }
+</style></head><body>
+<div class="container">
+<h1>Votre devis</h1>
+<p><strong>Volume pièce:</strong> $volume_pieces ml</p>
+<p><strong>Volume avec supports:</strong> $volume_total ml</p>
+<p><strong>Temps d'impression estimé:</strong> $print_time minutes</p>
+<table>
+  $breakdown_rows
+</table>
+<p><a href="/">&#8592; Faire un autre devis</a></p>
+</div></body></html>
+""")
+
+
+# The result page is pre-split at its dynamic tokens and the static
+# chunks encoded once, so building a response is a b"".join of cached
+# bytes plus the handful of freshly formatted numbers — no per-request
+# UTF-8 encoding of the multi-KB template.
+_RESULT_SPLIT = re.split(r'\$(volume_pieces|volume_total|print_time|breakdown_rows)', RESULT_TEMPLATE.template)
+RESULT_STATIC_BYTES = [chunk.encode("utf-8") for chunk in _RESULT_SPLIT[0::2]]
+RESULT_FIELD_ORDER = _RESULT_SPLIT[1::2]
+
+HTML_MEDIA_TYPE = "text/html; charset=utf-8"
+
+# Breakdown keys shown on the result page, in display order, with their
+# labels computed once instead of key.replace('_', ' ').title() per row
+# per request.
+BREAKDOWN_LABELS = {
+    key: key.replace('_', ' ').title()
+    for key in (
+        'material_cost', 'machine_cost', 'post_cost', 'finish_cost',
+        'price_ht_plate', 'packaging_cost', 'bag_cost', 'shipping_cost',
+        'total_ht', 'vat', 'total_ttc',
+    )
+}
+
+
+def render_result_page(values: Dict[str, str]) -> bytes:
+    """Assemble the result page from cached static chunks and `values`."""
+    parts = [RESULT_STATIC_BYTES[0]]
+    for field, static in zip(RESULT_FIELD_ORDER, RESULT_STATIC_BYTES[1:]):
+        parts.append(values[field].encode("utf-8"))
+        parts.append(static)
+    return b"".join(parts)
+
+
+def _extract_boundary(content_type: str) -> Optional[str]:
+    """Return the boundary token from a multipart Content-Type header."""
+    # Example header: multipart/form-data; boundary=----WebKitFormBoundary7MA4YWxkTrZu0gW
+    for part in content_type.split(";"):
+        part = part.strip()
+        if part.startswith("boundary="):
+            return part.split("=", 1)[1]
+    return None
+
+
+# Defensive caps on multipart parsing: pathological payloads (thousands
+# of tiny parts, oversized fields, absurd boundaries) are rejected early
+# instead of being fed to the STL parser.
+MAX_PARTS = 10_000
+MAX_FIELD_BYTES = 16 * 1024
+MAX_FILE_BYTES = 200 * 1024 * 1024
+MAX_BOUNDARY_LEN = 70  # per RFC 2046
+
+
+class MultipartLimitError(ValueError):
+    """Raised when a multipart payload exceeds one of the parser caps."""
+
+
+# One compiled regex pass replaces the per-line split/strip/lower dance
+# when parsing part headers; the disposition parameters are likewise
+# pulled out in a single findall.
+_HEADER_RE = re.compile(rb'([A-Za-z0-9-]+):[ \t]*([^\r\n]*)\r\n')
+_DISP_RE = re.compile(r'\b(name|filename)="([^"]*)"')
+
+
+def _parse_part_headers(header_block: bytes) -> Dict[str, str]:
+    """Parse the header block of one multipart segment into a dict."""
+    return {
+        m.group(1).lower().decode(): m.group(2).decode()
+        for m in _HEADER_RE.finditer(header_block + b"\r\n")
+    }
+
+
+def _parse_content_disposition(disp: str) -> Tuple[Optional[str], Optional[str]]:
+    """Extract the field name and optional filename from a disposition header."""
+    # content-disposition: form-data; name="field"; filename="file.stl"
+    name = None
+    filename = None
+    for key, value in _DISP_RE.findall(disp):
+        if key == "name":
+            name = value
+        else:
+            filename = value
+    return name, filename
 
 
 def parse_multipart(body: bytes, content_type: str) -> Dict[str, Any]:
     """Parse a multipart/form-data payload without python-multipart.
 
+    The body is scanned in a single pass using `bytes.find` to locate
+    boundary markers, instead of splitting the whole payload. Splitting
+    would copy every part (and the subsequent strip would copy again),
+    which for large STL uploads duplicates tens of megabytes per request.
+    Here part boundaries are tracked as indices, contents are sliced as
+    zero-copy `memoryview` objects, and only the uploaded file payload is
+    materialized as `bytes`; text fields are decoded straight from their
+    views.
+
     The result is a dictionary mapping field names to either a string
     (for regular fields) or a tuple `(filename, content_bytes)` for
     uploaded files.
@@ -56,152 +222,355 @@ def parse_multipart(body: bytes, content_type: str) -> Dict[str, Any]:
 
     Returns:
         Dictionary with parsed fields.
+
+    Raises:
+        MultipartLimitError: If the payload exceeds MAX_PARTS,
+            MAX_FIELD_BYTES or MAX_FILE_BYTES.
     """
-    # Extract boundary from content-type header
-    # Example header: multipart/form-data; boundary=----WebKitFormBoundary7MA4YWxkTrZu0gW
-    boundary = None
-    for part in content_type.split(";"):
-        part = part.strip()
-        if part.startswith("boundary="):
-            boundary = part.split("=", 1)[1]
-            break
-    if not boundary:
+    boundary = _extract_boundary(content_type)
+    if not boundary or len(boundary) > MAX_BOUNDARY_LEN:
         return {}
     boundary_bytes = ("--" + boundary).encode()
-    # Split body by boundary markers
-    segments = body.split(boundary_bytes)
+    blen = len(boundary_bytes)
+    mv = memoryview(body)
     fields: Dict[str, Any] = {}
-    for segment in segments:
-        segment = segment.strip()
-        # Skip empty or closing boundary
-        if not segment or segment == b"--":
-            continue
-        # Each segment has headers and content separated by double CRLF
-        try:
-            header_part, content = segment.split(b"\r\n\r\n", 1)
-        except ValueError:
+    parts = 0
+    pos = body.find(boundary_bytes)
+    while pos != -1:
+        parts += 1
+        if parts > MAX_PARTS:
+            raise MultipartLimitError("too many multipart segments")
+        part_start = pos + blen
+        # The closing marker is the boundary followed by "--"
+        if body[part_start : part_start + 2] == b"--":
+            break
+        next_pos = body.find(boundary_bytes, part_start)
+        if next_pos == -1:
+            break
+        # Skip the CRLF terminating the boundary line
+        if body[part_start : part_start + 2] == b"\r\n":
+            part_start += 2
+        # Headers and content are separated by a double CRLF
+        header_end = body.find(b"\r\n\r\n", part_start, next_pos)
+        if header_end == -1:
+            pos = next_pos
             continue
-        # Remove trailing CRLF from content
-        content = content.rstrip(b"\r\n")
-        # Parse headers
-        headers = {}
-        for header_line in header_part.split(b"\r\n"):
-            if b":" in header_line:
-                name, value = header_line.split(b":", 1)
-                headers[name.strip().lower()] = value.strip().decode()
-        disp = headers.get(b"content-disposition", headers.get("content-disposition"))
+        content_start = header_end + 4
+        # Drop the trailing CRLF that precedes the next boundary
+        content_end = max(next_pos - 2, content_start)
+        # Parse headers from a small materialized slice; the content itself
+        # stays a view into the original body
+        headers = _parse_part_headers(bytes(mv[part_start:header_end]))
+        disp = headers.get("content-disposition")
+        pos = next_pos
         if not disp:
             continue
-        # Extract field name and optional filename
-        name = None
-        filename = None
-        # content-disposition: form-data; name="field"; filename="file.stl"
-        for item in disp.split(";"):
-            item = item.strip()
-            if item.startswith("name="):
-                name = item.split("=", 1)[1].strip("\"")
-            elif item.startswith("filename="):
-                filename = item.split("=", 1)[1].strip("\"")
+        name, filename = _parse_content_disposition(disp)
         if not name:
             continue
         if filename:
-            fields[name] = (filename, content)
+            if content_end - content_start > MAX_FILE_BYTES:
+                raise MultipartLimitError("uploaded file too large")
+            # Only the file payload is materialized as bytes
+            fields[name] = (filename, bytes(mv[content_start:content_end]))
         else:
-            fields[name] = content.decode(errors="ignore")
+            if content_end - content_start > MAX_FIELD_BYTES:
+                raise MultipartLimitError("form field too large")
+            fields[name] = mv[content_start:content_end].tobytes().decode(errors="ignore")
     return fields
 
 
-def serve_app(engine: QuoteEngine) -> FastAPI:
-    """Create a FastAPI app for uploading STL files and obtaining quotes."""
+class MultipartStreamParser:
+    """Incrementally parse a multipart/form-data body from raw chunks.
+
+    Unlike :func:`parse_multipart`, which requires the whole request body
+    in memory, this parser is fed chunks as they arrive on the wire. The
+    uploaded file part is written straight to a temporary file on disk
+    while small text fields accumulate in memory, so resident memory
+    stays constant regardless of upload size. Usage::
+
+        parser = MultipartStreamParser(content_type, file_field="stlfile")
+        async for chunk in request.stream():
+            parser.feed(chunk)
+        fields = parser.finish()
+
+    The returned dictionary maps field names to strings, except for the
+    designated file field which maps to ``(filename, path)`` where
+    ``path`` points at the temporary file holding the upload. The caller
+    is responsible for removing that file when done.
+    """
+
+    # Upper bound on the unprocessed data buffered between chunks
+    WINDOW_SIZE = 64 * 1024
+
+    def __init__(self, content_type: str, file_field: str = "stlfile") -> None:
+        boundary = _extract_boundary(content_type)
+        if not boundary:
+            raise ValueError("missing multipart boundary")
+        if len(boundary) > MAX_BOUNDARY_LEN:
+            raise MultipartLimitError("multipart boundary too long")
+        # Boundaries in the body are always preceded by CRLF; seeding the
+        # window with one lets the very first boundary match the same
+        # delimiter without special-casing it.
+        self._delimiter = b"\r\n--" + boundary.encode()
+        self._window = bytearray(b"\r\n")
+        self._file_field = file_field
+        self._state = "preamble"
+        self._fields: Dict[str, Any] = {}
+        self._part_name: Optional[str] = None
+        self._part_filename: Optional[str] = None
+        self._file: Optional[Any] = None
+        self._file_path: Optional[Path] = None
+        self._text_buffer = bytearray()
+        self._parts = 0
+        self._file_bytes = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """Consume one chunk of the request body."""
+        if self._state == "done" or not chunk:
+            return
+        self._window.extend(chunk)
+        self._process()
+
+    def finish(self) -> Dict[str, Any]:
+        """Signal end of stream and return the collected fields.
+
+        A stream that ends inside a file part never saw its closing
+        boundary, so the part is incomplete: the partial temp file is
+        discarded the same way :meth:`cleanup` does, instead of being
+        left orphaned in the temp directory.
+        """
+        if self._file is not None:
+            self.cleanup()
+        return self._fields
+
+    def _process(self) -> None:
+        window = self._window
+        while True:
+            if self._state == "preamble":
+                idx = window.find(self._delimiter)
+                if idx == -1:
+                    # Keep only a potential partial delimiter at the tail
+                    keep = len(self._delimiter) - 1
+                    if len(window) > keep:
+                        del window[:-keep]
+                    return
+                del window[: idx + len(self._delimiter)]
+                self._state = "boundary_end"
+            elif self._state == "boundary_end":
+                if len(window) < 2:
+                    return
+                if window[:2] == b"--":
+                    self._state = "done"
+                    return
+                if window[:2] != b"\r\n":
+                    raise ValueError("malformed multipart boundary")
+                del window[:2]
+                self._state = "headers"
+            elif self._state == "headers":
+                # Locate the blank line by index instead of materializing
+                # and splitting the whole window on every feed
+                idx = window.find(b"\r\n\r\n")
+                if idx == -1:
+                    if len(window) > self.WINDOW_SIZE:
+                        raise ValueError("multipart headers too large")
+                    return
+                header_block = bytes(window[:idx])
+                del window[: idx + 4]
+                self._begin_part(header_block)
+                self._state = "body"
+            elif self._state == "body":
+                idx = window.find(self._delimiter)
+                if idx != -1:
+                    self._write(window[:idx])
+                    del window[: idx + len(self._delimiter)]
+                    self._end_part()
+                    self._state = "boundary_end"
+                    continue
+                # Flush all but a possible partial delimiter at the tail
+                keep = len(self._delimiter) - 1
+                if len(window) > keep:
+                    self._write(window[:-keep])
+                    del window[:-keep]
+                return
+            else:  # done
+                return
+
+    def cleanup(self) -> None:
+        """Close and remove the temporary upload file after a failure."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._file_path is not None:
+            try:
+                os.unlink(self._file_path)
+            except OSError:
+                pass
+            self._file_path = None
+
+    def _begin_part(self, header_block: bytes) -> None:
+        self._parts += 1
+        if self._parts > MAX_PARTS:
+            raise MultipartLimitError("too many multipart segments")
+        headers = _parse_part_headers(header_block)
+        disp = headers.get("content-disposition", "")
+        self._part_name, self._part_filename = _parse_content_disposition(disp)
+        self._text_buffer = bytearray()
+        if self._part_name == self._file_field and self._part_filename:
+            # 1 MB buffering batches the many small window flushes into
+            # one syscall per megabyte. The temp name is generated by the
+            # OS, never derived from the client-supplied filename.
+            f = tempfile.NamedTemporaryFile(
+                delete=False,
+                dir=tempfile.gettempdir(),
+                prefix="fersch_",
+                suffix=".stl",
+                buffering=1 << 20,
+            )
+            self._file = f
+            self._file_path = Path(f.name)
+            self._file_bytes = 0
+
+    def _write(self, data: bytes | bytearray) -> None:
+        if not self._part_name:
+            return
+        if self._file is not None:
+            self._file_bytes += len(data)
+            if self._file_bytes > MAX_FILE_BYTES:
+                raise MultipartLimitError("uploaded file too large")
+            self._file.write(data)
+        else:
+            if len(self._text_buffer) + len(data) > MAX_FIELD_BYTES:
+                raise MultipartLimitError("form field too large")
+            self._text_buffer.extend(data)
+
+    def _end_part(self) -> None:
+        if not self._part_name:
+            return
+        previous = self._fields.get(self._part_name)
+        if isinstance(previous, tuple):
+            # A repeated part name overwrites the recorded entry; drop
+            # the earlier temp file so it cannot be orphaned — the
+            # handler only ever sees (and unlinks) the last one
+            try:
+                os.unlink(previous[1])
+            except OSError:
+                pass
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._fields[self._part_name] = (self._part_filename, self._file_path)
+        else:
+            self._fields[self._part_name] = self._text_buffer.decode(errors="ignore")
+        self._part_name = None
+        self._part_filename = None
+
+
+# Engines keyed by (path, mtime): repeated lookups reuse the loaded
+# instance, while an edited spreadsheet transparently yields a fresh one.
+_ENGINE_CACHE: Dict[Tuple[str, float], QuoteEngine] = {}
+
+
+def get_engine(excel_path: str | Path) -> QuoteEngine:
+    """Return the QuoteEngine for the given Excel file, caching by mtime.
+
+    Under `uvicorn --workers N` each worker process resolves its engine
+    lazily on first use instead of parsing the spreadsheet at import
+    time; combined with the pickle parameter cache, worker boot amounts
+    to one unpickle.
+    """
+    path = Path(excel_path)
+    key = (str(path), path.stat().st_mtime)
+    engine = _ENGINE_CACHE.get(key)
+    if engine is None:
+        engine = QuoteEngine(path)
+        # Drop engines built for stale versions of the file
+        _ENGINE_CACHE.clear()
+        _ENGINE_CACHE[key] = engine
+    return engine
+
+
+def serve_app(excel_path: str | Path) -> FastAPI:
+    """Create a FastAPI app for uploading STL files and obtaining quotes.
+
+    The engine is resolved inside the request handlers via
+    :func:`get_engine`, so the first request — not server boot — pays for
+    parameter loading, and a replaced Excel file is picked up without a
+    restart.
+    """
     app = FastAPI()
+    # Initialize the JIT kernels here on the main thread: first use from
+    # a to_thread worker starts the Numba parallel runtime off the main
+    # thread and the process then hangs at shutdown, ignoring SIGTERM.
+    warm_up()
+    # STL parsing is CPU-bound and can take seconds on large meshes; it
+    # runs in worker threads so the event loop keeps serving, with
+    # concurrency capped at the core count to avoid thrashing.
+    volume_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
 
     @app.get("/")
-    async def form() -> HTMLResponse:
-        # Render a simple HTML form for uploading an STL and selecting options
-        material_options = "".join(
-            f'<option value="{name}">{name}</option>' for name in engine.materials.keys()
-        )
-        type_options = "".join(
-            f'<option value="{name}">{name}</option>' for name in engine.type_pieces.keys()
-        )
-        typology_options = "".join(
-            f'<option value="{name}">{name}</option>' for name in engine.typologies.keys()
-        )
-        html = f"""
-        <html>
-          <head>
-            <title>Devis Fersch 3D</title>
-            <style>
-              body {{ font-family: Arial, sans-serif; background: #f5f5f5; padding: 2rem; }}
-              .container {{ max-width: 600px; margin: auto; background: white; padding: 1rem 2rem; border-radius: 8px; box-shadow: 0 2px 6px rgba(0,0,0,0.1); }}
-              h1 {{ text-align: center; }}
-              label {{ display: block; margin-top: 1rem; }}
-              input, select {{ width: 100%; padding: 0.5rem; margin-top: 0.25rem; }}
-              button {{ margin-top: 1rem; padding: 0.75rem; width: 100%; background: #FAC900; border: none; border-radius: 4px; font-size: 1rem; cursor: pointer; }}
-            </style>
-          </head>
-          <body>
-            <div class="container">
-              <h1>Demande de devis</h1>
-              <form action="/quote" method="post" enctype="multipart/form-data">
-                <label>Fichier STL</label>
-                <input type="file" name="stlfile" accept=".stl,.obj" required />
-
-                <label>Matière</label>
-                <select name="material">{material_options}</select>
-
-                <label>Type de pièce</label>
-                <select name="type_piece">{type_options}</select>
-
-                <label>Typologie</label>
-                <select name="typology">{typology_options}</select>
-
-                <label>Quantité</label>
-                <input type="number" name="quantity" value="1" min="1" />
-
-                <label>Mode de livraison</label>
-                <select name="shipping">
-                  <option value="retrait">Retrait gratuit</option>
-                  <option value="livraison">Livraison (supplément)</option>
-                </select>
-
-                <button type="submit">Obtenir mon devis</button>
-              </form>
-            </div>
-          </body>
-        </html>
-        """
-        return HTMLResponse(content=html)
+    async def form() -> Response:
+        engine = get_engine(excel_path)
+        # The fully rendered form is static for a given engine: fill the
+        # template and UTF-8 encode it once, then serve the cached bytes
+        body = getattr(engine, "_form_html_bytes", None)
+        if body is None:
+            body = FORM_TEMPLATE.substitute(
+                material_options=engine._material_options_html,
+                type_options=engine._type_piece_options_html,
+                typology_options=engine._typology_options_html,
+            ).encode("utf-8")
+            engine._form_html_bytes = body
+        return Response(content=body, media_type=HTML_MEDIA_TYPE)
 
     @app.post("/quote")
-    async def upload_quote(request: Request) -> HTMLResponse:
-        # Read raw body
-        body = await request.body()
+    async def upload_quote(request: Request) -> Response:
+        engine = get_engine(excel_path)
+        # Parse the multipart body incrementally: the uploaded STL is
+        # streamed to a temporary file instead of being buffered in RAM
         content_type = request.headers.get("content-type", "")
-        fields = parse_multipart(body, content_type)
+        parser = None
+        try:
+            parser = MultipartStreamParser(content_type, file_field="stlfile")
+            async for chunk in request.stream():
+                parser.feed(chunk)
+            fields = parser.finish()
+        except MultipartLimitError:
+            # The constructor itself raises for an oversized boundary,
+            # in which case there is no parser to clean up yet
+            if parser is not None:
+                parser.cleanup()
+            return HTMLResponse(content="<p>Erreur: fichier ou requête trop volumineux.</p>", status_code=413)
+        except ValueError:
+            if parser is not None:
+                parser.cleanup()
+            return HTMLResponse(content="<p>Erreur: requête multipart invalide.</p>", status_code=400)
         # Extract fields
         file_tuple = fields.get("stlfile")
         if not file_tuple or not isinstance(file_tuple, tuple):
             return HTMLResponse(content="<p>Erreur: fichier manquant.</p>", status_code=400)
-        filename, file_content = file_tuple
-        material = fields.get("material") or next(iter(engine.materials.keys()))
-        type_piece = fields.get("type_piece") or next(iter(engine.type_pieces.keys()))
-        typology = fields.get("typology") or next(iter(engine.typologies.keys()))
+        filename, temp_path = file_tuple
+        material = fields.get("material") or engine.default_material
+        type_piece = fields.get("type_piece") or engine.default_type_piece
+        typology = fields.get("typology") or engine.default_typology
         quantity_str = fields.get("quantity", "1")
         try:
             quantity = max(1, int(quantity_str))
         except ValueError:
             quantity = 1
         shipping = fields.get("shipping", "retrait")
-        # Save uploaded file temporarily
-        temp_path = Path("/tmp") / ("upload_" + filename)
-        with open(temp_path, "wb") as f:
-            f.write(file_content)
-        # Compute volume and bounding box
+        # Compute volume and bounding box from the streamed temp file,
+        # then remove it — it is only needed for this one parse
         try:
-            volume_ml, dims = compute_volume_and_bbox(temp_path)
+            async with volume_semaphore:
+                volume_ml, dims = await asyncio.to_thread(compute_volume_and_bbox, temp_path)
         except Exception as exc:
             return HTMLResponse(content=f"<p>Erreur lors du calcul du volume: {exc}</p>", status_code=500)
+        finally:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
         largest_dim = dims[0] if dims else None
         # Compute quote
         quote = engine.compute_quote(
@@ -215,34 +584,20 @@ def serve_app(engine: QuoteEngine) -> FastAPI:
         )
         # Build HTML response
         breakdown_rows = "".join(
-            f"<tr><td>{key.replace('_', ' ').title()}</td><td>{value:.2f} €</td></tr>"
-            for key, value in quote.items()
-            if key in ['material_cost', 'machine_cost', 'post_cost', 'finish_cost', 'price_ht_plate', 'packaging_cost', 'bag_cost', 'shipping_cost', 'total_ht', 'vat', 'total_ttc']
+            f"<tr><td>{label}</td><td>{quote[key]:.2f} €</td></tr>"
+            for key, label in BREAKDOWN_LABELS.items()
+            if key in quote
         )
         # Volume with supports and print time display
         volume_total = quote.get('volume_with_supports_ml', volume_ml * quantity)
         print_time_min = quote.get('print_time_minutes')
-        html = f"""
-        <html><head><title>Votre devis</title><style>
-        body {{ font-family: Arial, sans-serif; background: #f5f5f5; padding: 2rem; }}
-        .container {{ max-width: 600px; margin: auto; background: white; padding: 1rem 2rem; border-radius: 8px; box-shadow: 0 2px 6px rgba(0,0,0,0.1); }}
-        h1 {{ text-align: center; }}
-        table {{ width: 100%; border-collapse: collapse; margin-top: 1rem; }}
-        td {{ padding: 0.5rem; border-bottom: 1px solid #ddd; }}
-        td:first-child {{ font-weight: bold; }}
-        </style></head><body>
-        <div class="container">
-        <h1>Votre devis</h1>
-        <p><strong>Volume pièce:</strong> {volume_ml*quantity:.2f} ml</p>
-        <p><strong>Volume avec supports:</strong> {volume_total:.2f} ml</p>
-        <p><strong>Temps d'impression estimé:</strong> {print_time_min:.1f} minutes</p>
-        <table>
-          {breakdown_rows}
-        </table>
-        <p><a href="/">&#8592; Faire un autre devis</a></p>
-        </div></body></html>
-        """
-        return HTMLResponse(content=html)
+        body = render_result_page({
+            'volume_pieces': f"{volume_ml*quantity:.2f}",
+            'volume_total': f"{volume_total:.2f}",
+            'print_time': f"{print_time_min:.1f}",
+            'breakdown_rows': breakdown_rows,
+        })
+        return Response(content=body, media_type=HTML_MEDIA_TYPE)
 
     return app
 
@@ -276,9 +631,8 @@ def main() -> None:
     args = parser.parse_args()
     # Determine excel path
     excel_path = os.getenv("EXCEL_FILE", "../Calcul prix 3D FERSCH.xlsx")
-    engine = QuoteEngine(excel_path)
     if args.serve:
-        app = serve_app(engine)
+        app = serve_app(excel_path)
         import uvicorn  # type: ignore
         host = os.getenv("HOST", "0.0.0.0")
         port = int(os.getenv("PORT", "8000"))
@@ -287,10 +641,11 @@ def main() -> None:
         # CLI requires --stl
         if not args.stl:
             parser.error("--stl is required in CLI mode")
+        engine = get_engine(excel_path)
         # Set defaults if not provided
-        args.material = args.material or next(iter(engine.materials.keys()))
-        args.type_piece = args.type_piece or next(iter(engine.type_pieces.keys()))
-        args.typology = args.typology or next(iter(engine.typologies.keys()))
+        args.material = args.material or engine.default_material
+        args.type_piece = args.type_piece or engine.default_type_piece
+        args.typology = args.typology or engine.default_typology
         cli(engine, args)
 
 
@@ -31,13 +31,98 @@ Author: Fersch 3D quoting engine
 
 from __future__ import annotations
 
+import bisect
+import functools
+import html
+import itertools
+import pickle
 import threading
+import weakref
+from array import array
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import openpyxl
 
+try:  # Numba is optional; quote arithmetic falls back to pure Python
+    import numba
+except ImportError:  # pragma: no cover - depends on environment
+    numba = None
+
+if numba is not None:
+    import numpy as np
+
+    @numba.njit(cache=True, fastmath=True)
+    def _quote_kernel(volume_ml, quantity, price_per_ml_with_loss, type_factor,
+                      support_percent, speed_tenth, largest_dimension_mm,
+                      time_factor, machine_time_per_ml, machine_hour_rate,
+                      post_rate, finish_rate, tva_rate, bag_price,
+                      shipping_cost, markup_thresholds, markup_factors,
+                      packaging_thresholds, packaging_prices):
+        """Compiled quote arithmetic; mirrors _compute_quote_impl exactly.
+
+        A negative largest_dimension_mm stands in for None (volume-based
+        print time fallback). Compiled with cache=True so the JIT cost is
+        paid once per deployment, not per process.
+        """
+        eff_volume_ml = volume_ml * quantity
+        volume_with_supports_ml = eff_volume_ml * (1.0 + support_percent / 100.0)
+        material_cost = volume_with_supports_ml * price_per_ml_with_loss * type_factor
+        if largest_dimension_mm >= 0.0:
+            speed_mm_s = speed_tenth / 10.0
+            machine_time_hours = (largest_dimension_mm * time_factor) / speed_mm_s / 3600.0
+        else:
+            machine_time_hours = volume_with_supports_ml * machine_time_per_ml * type_factor
+        machine_cost = machine_time_hours * machine_hour_rate
+        base_cost = material_cost + machine_cost
+        post_cost = base_cost * post_rate
+        finish_cost = base_cost * finish_rate
+        total_cost_before_markup = base_cost + post_cost + finish_cost
+        mi = np.searchsorted(markup_thresholds, eff_volume_ml, side='right') - 1
+        markup_factor = 1.0 if mi < 0 else markup_factors[mi]
+        price_ht_plate = total_cost_before_markup * markup_factor
+        pi = np.searchsorted(packaging_thresholds, eff_volume_ml, side='right') - 1
+        packaging_cost = 0.0 if pi < 0 else packaging_prices[pi]
+        bag_cost = bag_price * quantity
+        total_ht = price_ht_plate + packaging_cost + bag_cost + shipping_cost
+        vat = total_ht * tva_rate
+        total_ttc = total_ht + vat
+        return (material_cost, machine_cost, base_cost, post_cost, finish_cost,
+                total_cost_before_markup, markup_factor, price_ht_plate,
+                packaging_cost, bag_cost, total_ht, vat, total_ttc,
+                volume_with_supports_ml, machine_time_hours)
+else:
+    _quote_kernel = None
+
+# Engine attributes persisted in the sidecar parameter cache. Everything
+# here is derived solely from the Excel file; env-driven settings
+# (support %, print speed, time factor) are applied after loading.
+_CACHED_FIELDS = (
+    'materials',
+    'type_pieces',
+    'typologies',
+    'markup_table',
+    'packaging_table',
+    'post_rate',
+    'finish_rate',
+    'tva_rate',
+    'machine_hour_rate',
+    'shipping_retrait',
+    'shipping_delivery',
+)
+
+
+# Labelled rates in columns 7/8 of the sheet: lowercase needle -> engine
+# attribute. Scanned once per row instead of duplicating if/elif chains.
+_RATE_MAP = (
+    ('post', 'post_rate'),
+    ('finition', 'finish_rate'),
+    ('tva', 'tva_rate'),
+    ('frais retrait', 'shipping_retrait'),
+    ('frais livraison', 'shipping_delivery'),
+)
+
 
 @dataclass
 class Material:
@@ -64,6 +149,10 @@ class QuoteEngine:
         self.excel_path = Path(excel_path)
         self._lock = threading.Lock()
         self._loaded = False
+        # Never-reused cache identity; id(self) is unsafe here because
+        # CPython recycles addresses of collected engines while their
+        # memoized quotes are still in the LRU cache
+        self._cache_token = next(_engine_tokens)
         # Containers for parameters
         self.materials: Dict[str, Material] = {}
         self.type_pieces: Dict[str, TypePiece] = {}
@@ -84,6 +173,8 @@ class QuoteEngine:
         self.material_print_speed: Dict[str, float] = {}
         # Global time factor for print time estimation
         self.time_factor: float = 1.0
+        # NumPy arrays for compute_quote_batch, built lazily on first use
+        self._batch_ready = False
         # Populate parameters
         self._load_parameters()
         # After loading parameters, apply defaults from environment variables if provided
@@ -104,26 +195,155 @@ class QuoteEngine:
         for mat_name in self.materials:
             self.material_support_percent.setdefault(mat_name, default_support)
             self.material_print_speed.setdefault(mat_name, default_speed)
+        # Precompute the HTML <option> lists for the web form once. The
+        # parameter dicts never change after loading, so rebuilding these
+        # strings per request would be pure waste. Names are HTML-escaped
+        # here so a quote or angle bracket in a spreadsheet cell cannot
+        # break (or inject into) the form markup, at zero per-request cost.
+        self._material_options_html = self._build_options_html(self.materials)
+        self._type_piece_options_html = self._build_options_html(self.type_pieces)
+        self._typology_options_html = self._build_options_html(self.typologies)
+        # Default selections (first entry of each table), resolved once
+        # instead of spinning up a fresh dict iterator per request
+        self.default_material: Optional[str] = next(iter(self.materials), None)
+        self.default_type_piece: Optional[str] = next(iter(self.type_pieces), None)
+        self.default_typology: Optional[str] = next(iter(self.typologies), None)
+        # Flatten the per-quote parameter lookups into one dict access:
+        # (material, type, typology) -> (price/ml, factor, bag price,
+        # support %, print speed). Built after the env defaults above so
+        # the support/speed values are final.
+        self._combo: Dict[Tuple[str, str, str], Tuple[float, float, float, float, float]] = {
+            (m, t, ty): (
+                self.materials[m].price_per_ml_with_loss,
+                self.type_pieces[t].factor,
+                self.typologies[ty].bag_price,
+                self.material_support_percent.get(m, 0.0),
+                self.material_print_speed.get(m, 10.0),
+            )
+            for m in self.materials
+            for t in self.type_pieces
+            for ty in self.typologies
+        }
+
+    @staticmethod
+    def _build_options_html(names: Dict[str, object]) -> str:
+        """Build an HTML <option> list from escaped parameter names."""
+        return "".join(
+            f'<option value="{esc}">{esc}</option>'
+            for esc in (html.escape(name, quote=True) for name in names)
+        )
+
+    def _stat_key(self) -> Tuple[float, int]:
+        """Return the (mtime, size) fingerprint of the Excel file."""
+        st = self.excel_path.stat()
+        return (st.st_mtime, st.st_size)
+
+    @property
+    def _cache_path(self) -> Path:
+        return self.excel_path.with_suffix('.params.pkl')
+
+    def _load_from_cache(self) -> bool:
+        """Try to restore parameters from the sidecar pickle cache.
+
+        Returns True on success. The cache is keyed on the Excel file's
+        mtime and size, so editing the spreadsheet invalidates it
+        automatically — consistent with the documented contract that the
+        engine is reinstantiated when the Excel file changes.
+        """
+        try:
+            with open(self._cache_path, 'rb') as f:
+                stat_key, fields = pickle.load(f)
+        except Exception:
+            # A sidecar written by an incompatible module version can
+            # fail in arbitrary ways (ModuleNotFoundError,
+            # AttributeError, ...); the cache is best-effort, so any
+            # failure just means re-parsing the workbook.
+            return False
+        if stat_key != self._stat_key():
+            return False
+        for name in _CACHED_FIELDS:
+            if name not in fields:
+                return False
+        for name in _CACHED_FIELDS:
+            setattr(self, name, fields[name])
+        self._build_lookup_arrays()
+        return True
+
+    def _save_cache(self) -> None:
+        """Persist the loaded parameters next to the Excel file."""
+        try:
+            with open(self._cache_path, 'wb') as f:
+                payload = (self._stat_key(), {name: getattr(self, name) for name in _CACHED_FIELDS})
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # Cache is best-effort; a read-only directory just means the
+            # next boot parses the Excel again.
+            pass
+
+    def _read_sheet_rows(self) -> List[Tuple]:
+        """Read the 'Paramètres' sheet as a list of value tuples.
+
+        Prefers python-calamine (a Rust-backed XLSX reader, typically an
+        order of magnitude faster than openpyxl for read-only value
+        extraction) and falls back to openpyxl when it is not installed.
+        This only matters on a cold boot; warm boots restore from the
+        pickle cache before reaching here.
+        """
+        try:
+            from python_calamine import CalamineWorkbook
+        except ImportError:
+            CalamineWorkbook = None
+        if CalamineWorkbook is not None:
+            wb = CalamineWorkbook.from_path(str(self.excel_path))
+            sheet = wb.get_sheet_by_name('Paramètres')
+            # Calamine renders empty cells as '' — map them to None so
+            # the sentinel checks below behave like the openpyxl path.
+            # skip_empty_area=False keeps leading empty rows/columns so
+            # the fixed row indices line up with the openpyxl path.
+            return [
+                tuple(v if v != '' else None for v in r)
+                for r in sheet.to_python(skip_empty_area=False)
+            ]
+        # read_only mode streams rows instead of building the full sheet
+        # model, and values_only skips per-access Cell object creation
+        wb = openpyxl.load_workbook(self.excel_path, data_only=True, read_only=True)
+        ws = wb['Paramètres']
+        rows = list(ws.iter_rows(values_only=True))
+        wb.close()
+        return rows
 
     def _load_parameters(self) -> None:
-        """Internal method to read the Excel file and extract parameters."""
+        """Internal method to read the Excel file and extract parameters.
+
+        On a warm start the parameters are restored from a pickle cache
+        stored next to the Excel file, skipping openpyxl's XLSX parsing
+        entirely — the dominant cost of engine construction.
+        """
         with self._lock:
             if self._loaded:
                 return
-            wb = openpyxl.load_workbook(self.excel_path, data_only=True)
-            ws = wb['Paramètres']
+            if self._load_from_cache():
+                self._loaded = True
+                return
+            # Rows are padded to a fixed width so the column indexing
+            # below can never fall off a short tuple.
+            width = 8
+            rows = [
+                r + (None,) * (width - len(r)) if len(r) < width else r
+                for r in self._read_sheet_rows()
+            ]
+            max_row = len(rows)
             # Load materials
-            # Materials are listed starting at row 7 (1‑indexed) under the header row (row 6)
-            row = 7
-            while True:
-                name_cell = ws.cell(row=row, column=1).value
+            # Materials are listed starting at row 7 (1‑indexed) under the header row (row 6)
+            for vals in rows[6:]:
+                name_cell = vals[0]
                 if not name_cell or not isinstance(name_cell, str):
                     break
                 name = name_cell.strip()
-                price_per_litre = ws.cell(row=row, column=2).value or 0.0
-                loss_percent = ws.cell(row=row, column=3).value or 0.0
+                price_per_litre = vals[1] or 0.0
+                loss_percent = vals[2] or 0.0
                 # Compute price per ml with loss; handle header strings gracefully
-                raw_price = ws.cell(row=row, column=5).value
+                raw_price = vals[4]
                 price_per_ml_with_loss: float
                 try:
                     price_per_ml_with_loss = float(raw_price)
@@ -132,124 +352,99 @@ class QuoteEngine:
                     price_per_ml = (price_per_litre / 1000.0) if price_per_litre else 0.0
                     price_per_ml_with_loss = price_per_ml * (1.0 + float(loss_percent))
                 self.materials[name] = Material(name=name, price_per_ml_with_loss=price_per_ml_with_loss)
-                row += 1
             # Load machine cost
             # 'Coût horaire arrondi (€/h)' is at row 10 column 8
             try:
-                machine_hour = ws.cell(row=10, column=8).value
+                machine_hour = rows[9][7] if max_row >= 10 else None
                 if machine_hour:
                     self.machine_hour_rate = float(machine_hour)
             except Exception:
                 pass
-            # Load type pieces, typologies, and rates
+            # Load type pieces and typologies (the labelled rates on these
+            # rows are handled by the single pass further down)
             # Skip header rows (row 12 and 13) then read until we hit a blank row or the shipping section
-            row = 14  # first row containing actual type definitions
-            while row <= ws.max_row:
-                type_name = ws.cell(row=row, column=1).value
+            for vals in rows[13:]:
+                type_name = vals[0]
                 # Stop if we reach a row where column 1 is None and column 7 has 'RETRAIT / LIVRAISON'
-                if type_name is None and ws.cell(row=row, column=7).value:
+                if type_name is None and vals[6]:
                     break
                 if type_name and isinstance(type_name, str):
                     try:
-                        factor = float(ws.cell(row=row, column=2).value)
+                        factor = float(vals[1])
                         self.type_pieces[type_name.strip()] = TypePiece(name=type_name.strip(), factor=factor)
                     except (TypeError, ValueError):
                         pass
-                typology_name = ws.cell(row=row, column=4).value
+                typology_name = vals[3]
                 if typology_name and isinstance(typology_name, str):
                     try:
-                        bag_price = float(ws.cell(row=row, column=5).value)
+                        bag_price = float(vals[4])
                         self.typologies[typology_name.strip()] = Typology(name=typology_name.strip(), bag_price=bag_price)
                     except (TypeError, ValueError):
                         pass
-                # Rates (post‑traitement, finition, TVA) live in column 7 and 8 on rows with type pieces
-                rate_label = ws.cell(row=row, column=7).value
-                rate_value = ws.cell(row=row, column=8).value
-                if rate_label and isinstance(rate_label, str):
-                    lower = rate_label.strip().lower()
-                    try:
-                        val = float(rate_value)
-                    except (TypeError, ValueError):
-                        val = None
-                    if val is not None:
-                        if 'post' in lower:
-                            self.post_rate = val
-                        elif 'finition' in lower:
-                            self.finish_rate = val
-                        elif 'tva' in lower:
-                            self.tva_rate = val
-                row += 1
-            # After finishing type pieces, parse shipping costs explicitly
-            for r in range(1, ws.max_row + 1):
-                label = ws.cell(row=r, column=7).value
-                value = ws.cell(row=r, column=8).value
-                if not label:
-                    continue
-                if isinstance(label, str):
+            # One pass over the sheet handles every labelled rate in
+            # columns 7/8 (post-traitement, finition, TVA and the two
+            # shipping costs, via _RATE_MAP) and locates the MARK-UP
+            # banner row. The label is lowercased once per row.
+            markup_banner = None  # 0-based index of the 'MARK-UP' banner row
+            for i, vals in enumerate(rows):
+                label = vals[6]
+                if label and isinstance(label, str):
                     l = label.strip().lower()
                     try:
-                        v = float(value)
+                        v = float(vals[7])
                     except (TypeError, ValueError):
-                        continue
-                    if 'frais retrait' in l:
-                        self.shipping_retrait = v
-                    elif 'frais livraison' in l:
-                        self.shipping_delivery = v
-            # Find row containing 'MARK-UP (selon ml plateau)' and packaging
-            for r in range(1, ws.max_row + 1):
-                cell = ws.cell(row=r, column=1).value
-                if isinstance(cell, str) and 'MARK-UP' in cell:
-                    # The header row for mark-ups is at r+1
-                    mrow = r + 1
-                    # iterate rows until an empty cell
-                    cur = mrow + 1
-                    while True:
-                        ml_min = ws.cell(row=cur, column=1).value
-                        factor = ws.cell(row=cur, column=2).value
-                        if ml_min is None or factor is None:
-                            break
-                        self.markup_table.append((float(ml_min), float(factor)))
-                        cur += 1
-                    # Packaging columns start at column 4 and 5 on the same rows
-                    cur = mrow + 1
-                    while True:
-                        ml_total_min = ws.cell(row=cur, column=4).value
-                        price_carton = ws.cell(row=cur, column=5).value
-                        if ml_total_min is None or price_carton is None:
-                            break
-                        self.packaging_table.append((float(ml_total_min), float(price_carton)))
-                        cur += 1
-                    # Shipping delivery cost is in column 8 of the header row +1 (same row as
-                    # packaging header). We loaded shipping_retrait earlier; next row holds shipping delivery.
-                    try:
-                        self.shipping_delivery = float(ws.cell(row=r, column=8).value or self.shipping_delivery)
-                    except Exception:
-                        pass
-                    break
+                        v = None
+                    if v is not None:
+                        for needle, attr in _RATE_MAP:
+                            if needle in l:
+                                setattr(self, attr, v)
+                                break
+                first = vals[0]
+                if markup_banner is None and isinstance(first, str) and 'MARK-UP' in first:
+                    markup_banner = i
+            if markup_banner is not None:
+                # The header row sits below the banner; table rows follow it
+                for vals in rows[markup_banner + 2:]:
+                    if vals[0] is None or vals[1] is None:
+                        break
+                    self.markup_table.append((float(vals[0]), float(vals[1])))
+                # Packaging columns start at column 4 and 5 on the same rows
+                for vals in rows[markup_banner + 2:]:
+                    if vals[3] is None or vals[4] is None:
+                        break
+                    self.packaging_table.append((float(vals[3]), float(vals[4])))
+                # Shipping delivery cost is in column 8 of the banner row
+                try:
+                    self.shipping_delivery = float(rows[markup_banner][7] or self.shipping_delivery)
+                except Exception:
+                    pass
             # Sort the tables for binary search later
             self.markup_table.sort(key=lambda x: x[0])
             self.packaging_table.sort(key=lambda x: x[0])
+            self._build_lookup_arrays()
+            self._save_cache()
             self._loaded = True
 
+    def _build_lookup_arrays(self) -> None:
+        """Split the sorted step tables into parallel threshold/value arrays.
+
+        The thresholds live in an `array('d')` so `bisect` compares raw
+        doubles at C level instead of unpacking tuples per step.
+        """
+        self._markup_thresholds = array('d', (t for t, _ in self.markup_table))
+        self._markup_factors = [f for _, f in self.markup_table]
+        self._packaging_thresholds = array('d', (t for t, _ in self.packaging_table))
+        self._packaging_prices = [p for _, p in self.packaging_table]
+
     def _get_markup_factor(self, volume_ml: float) -> float:
         """Return the mark‑up factor for a given volume (ml)."""
-        factor = 1.0
-        for ml_min, f in self.markup_table:
-            if volume_ml >= ml_min:
-                factor = f
-            else:
-                break
-        return factor
+        i = bisect.bisect_right(self._markup_thresholds, volume_ml) - 1
+        return 1.0 if i < 0 else self._markup_factors[i]
 
     def _get_packaging_cost(self, total_volume_ml: float) -> float:
         """Return the packaging cost based on total volume (ml)."""
-        price = 0.0
-        for ml_min, p in self.packaging_table:
-            if total_volume_ml >= ml_min:
-                price = p
-            else:
-                break
-        return price
+        i = bisect.bisect_right(self._packaging_thresholds, total_volume_ml) - 1
+        return 0.0 if i < 0 else self._packaging_prices[i]
 
     def compute_quote(
         self,
@@ -261,6 +456,43 @@ class QuoteEngine:
         shipping_method: str = 'retrait',
         add_painting: bool = False,
         largest_dimension_mm: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """Compute a detailed quote, memoizing repeated identical requests.
+
+        The web form produces a narrow space of option combinations, so
+        quoting the same STL twice would redo the same arithmetic. The
+        actual computation lives in :meth:`_compute_quote_impl`; this
+        wrapper routes through an LRU cache keyed on the engine's cache
+        token and the (quantized) inputs. Floats are rounded before
+        keying to collapse near-identical volumes into one entry. A
+        fresh copy of the breakdown dict is returned so callers can
+        mutate it safely. See :meth:`_compute_quote_impl` for argument
+        semantics.
+        """
+        _engine_refs[self._cache_token] = self
+        result = _cached_quote(
+            self._cache_token,
+            round(volume_ml, 3),
+            material_name,
+            type_piece_name,
+            typology_name,
+            quantity,
+            shipping_method,
+            add_painting,
+            round(largest_dimension_mm, 2) if largest_dimension_mm is not None else None,
+        )
+        return dict(result)
+
+    def _compute_quote_impl(
+        self,
+        volume_ml: float,
+        material_name: str,
+        type_piece_name: str,
+        typology_name: str,
+        quantity: int = 1,
+        shipping_method: str = 'retrait',
+        add_painting: bool = False,
+        largest_dimension_mm: Optional[float] = None,
     ) -> Dict[str, float]:
         """Compute a detailed quote.
 
@@ -283,63 +515,221 @@ class QuoteEngine:
         """
         if quantity < 1:
             quantity = 1
-        # Retrieve material price
-        if material_name not in self.materials:
-            raise ValueError(f"Unknown material: {material_name}")
-        mat = self.materials[material_name]
-        # Retrieve type piece factor
-        type_factor = self.type_pieces.get(type_piece_name, TypePiece(type_piece_name, 1.0)).factor
-        # Retrieve typology bag price
-        bag_price = self.typologies.get(typology_name, Typology(typology_name, 0.0)).bag_price
-        # Effective volume with quantity and type factor (type factor scales time and material)
-        eff_volume_ml = volume_ml * quantity
-        # Add supports based on material
-        support_percent = self.material_support_percent.get(material_name, 0.0)
-        volume_with_supports_ml = eff_volume_ml * (1.0 + support_percent / 100.0)
-        # Material cost
-        material_cost = volume_with_supports_ml * mat.price_per_ml_with_loss * type_factor
-        # Machine cost
-        # Estimate print time in hours: using either machine_time_per_ml or bounding box + speed/time_factor
-        machine_time_hours: float
-        if largest_dimension_mm is not None:
-            # Compute printing speed in mm/s for the material
-            speed_tenth = self.material_print_speed.get(material_name)
-            if speed_tenth is None:
-                speed_mm_s = 1.0  # default to 1 mm/s
-            else:
-                speed_mm_s = speed_tenth / 10.0
-            # Estimate time in seconds
-            time_seconds = (largest_dimension_mm * self.time_factor) / speed_mm_s
-            machine_time_hours = time_seconds / 3600.0
+        # One dict access resolves price, type factor, bag price, support
+        # percentage and print speed for known option combinations; the
+        # individual lookups only run for names absent from the tables.
+        combo = self._combo.get((material_name, type_piece_name, typology_name))
+        if combo is not None:
+            price_per_ml_with_loss, type_factor, bag_price, support_percent, speed_tenth = combo
         else:
-            # Fallback to volume based approximation
-            machine_time_hours = volume_with_supports_ml * self.machine_time_per_ml * type_factor
-        machine_cost = machine_time_hours * self.machine_hour_rate
-        # Base cost
-        base_cost = material_cost + machine_cost
-        # Post‑treatment and finishing
-        post_cost = base_cost * self.post_rate
-        finish_cost = base_cost * self.finish_rate
+            # Retrieve material price
+            if material_name not in self.materials:
+                raise ValueError(f"Unknown material: {material_name}")
+            price_per_ml_with_loss = self.materials[material_name].price_per_ml_with_loss
+            # Retrieve type piece factor
+            type_factor = self.type_pieces.get(type_piece_name, TypePiece(type_piece_name, 1.0)).factor
+            # Retrieve typology bag price
+            bag_price = self.typologies.get(typology_name, Typology(typology_name, 0.0)).bag_price
+            support_percent = self.material_support_percent.get(material_name, 0.0)
+            speed_tenth = self.material_print_speed.get(material_name, 10.0)
+        # Shipping cost
+        shipping_cost = self.shipping_retrait if shipping_method == 'retrait' else self.shipping_delivery
         # Additional painting cost (set to zero as placeholder)
         painting_cost = 0.0
         if add_painting:
             # TODO: implement painting cost logic; for now, a flat 0
             painting_cost = 0.0
-        total_cost_before_markup = base_cost + post_cost + finish_cost + painting_cost
-        # Mark‑up factor based on per‑plate volume (assuming one plate per order)
-        markup_factor = self._get_markup_factor(eff_volume_ml)
+        kernel_result = None
+        if _quote_kernel is not None:
+            # Compiled path: all of the arithmetic plus the two
+            # step-function lookups run in one native call
+            if not self._batch_ready:
+                self._build_batch_arrays()
+            try:
+                kernel_result = _quote_kernel(
+                    volume_ml, float(quantity), price_per_ml_with_loss, type_factor,
+                    support_percent, speed_tenth,
+                    -1.0 if largest_dimension_mm is None else float(largest_dimension_mm),
+                    self.time_factor, self.machine_time_per_ml, self.machine_hour_rate,
+                    self.post_rate, self.finish_rate, self.tva_rate, bag_price,
+                    shipping_cost,
+                    self._markup_thresholds_np, self._markup_factors_np,
+                    self._packaging_thresholds_np, self._packaging_prices_np,
+                )
+            except Exception:
+                # A stale on-disk JIT cache (cache=True, written when
+                # this module was imported under a different name) raises
+                # from inside the dispatcher instead of recompiling; fall
+                # through to the Python arithmetic below
+                kernel_result = None
+        if kernel_result is not None:
+            (material_cost, machine_cost, base_cost, post_cost, finish_cost,
+             total_cost_before_markup, markup_factor, price_ht_plate,
+             packaging_cost, bag_cost, total_ht, vat, total_ttc,
+             volume_with_supports_ml, machine_time_hours) = kernel_result
+        else:
+            # Effective volume with quantity and type factor (type factor scales time and material)
+            eff_volume_ml = volume_ml * quantity
+            # Add supports based on material
+            volume_with_supports_ml = eff_volume_ml * (1.0 + support_percent / 100.0)
+            # Material cost
+            material_cost = volume_with_supports_ml * price_per_ml_with_loss * type_factor
+            # Machine cost
+            # Estimate print time in hours: using either machine_time_per_ml or bounding box + speed/time_factor
+            machine_time_hours: float
+            if largest_dimension_mm is not None:
+                # Printing speed is stored in tenths of mm/s
+                speed_mm_s = speed_tenth / 10.0
+                # Estimate time in seconds
+                time_seconds = (largest_dimension_mm * self.time_factor) / speed_mm_s
+                machine_time_hours = time_seconds / 3600.0
+            else:
+                # Fallback to volume based approximation
+                machine_time_hours = volume_with_supports_ml * self.machine_time_per_ml * type_factor
+            machine_cost = machine_time_hours * self.machine_hour_rate
+            # Base cost
+            base_cost = material_cost + machine_cost
+            # Post‑treatment and finishing
+            post_cost = base_cost * self.post_rate
+            finish_cost = base_cost * self.finish_rate
+            total_cost_before_markup = base_cost + post_cost + finish_cost + painting_cost
+            # Mark‑up factor based on per‑plate volume (assuming one plate per order)
+            markup_factor = self._get_markup_factor(eff_volume_ml)
+            price_ht_plate = total_cost_before_markup * markup_factor
+            # Packaging and bag costs
+            packaging_cost = self._get_packaging_cost(eff_volume_ml)
+            bag_cost = bag_price * quantity
+            # Total HT
+            total_ht = price_ht_plate + packaging_cost + bag_cost + shipping_cost
+            # VAT
+            vat = total_ht * self.tva_rate
+            total_ttc = total_ht + vat
+        # Print time in minutes
+        print_time_minutes = machine_time_hours * 60.0
+        return {
+            'material_cost': material_cost,
+            'machine_cost': machine_cost,
+            'base_cost': base_cost,
+            'post_cost': post_cost,
+            'finish_cost': finish_cost,
+            'painting_cost': painting_cost,
+            'total_cost_before_markup': total_cost_before_markup,
+            'markup_factor': markup_factor,
+            'price_ht_plate': price_ht_plate,
+            'packaging_cost': packaging_cost,
+            'bag_cost': bag_cost,
+            'shipping_cost': shipping_cost,
+            'total_ht': total_ht,
+            'vat': vat,
+            'total_ttc': total_ttc,
+            'volume_with_supports_ml': volume_with_supports_ml,
+            'print_time_minutes': print_time_minutes,
+        }
+
+    def _build_batch_arrays(self) -> None:
+        """Build the NumPy lookup arrays backing :meth:`compute_quote_batch`.
+
+        NumPy is only required for batch pricing, so it is imported here
+        rather than at module import time.
+        """
+        import numpy as np
+
+        self._mat_idx = {name: i for i, name in enumerate(self.materials)}
+        self._mat_price = np.array([m.price_per_ml_with_loss for m in self.materials.values()])
+        self._mat_support = np.array([self.material_support_percent.get(n, 0.0) for n in self.materials])
+        self._mat_speed = np.array([self.material_print_speed.get(n, 10.0) for n in self.materials])
+        self._type_idx = {name: i for i, name in enumerate(self.type_pieces)}
+        self._type_factor_arr = np.array([t.factor for t in self.type_pieces.values()])
+        self._typology_idx = {name: i for i, name in enumerate(self.typologies)}
+        self._typology_bag = np.array([t.bag_price for t in self.typologies.values()])
+        self._markup_thresholds_np = np.asarray(self._markup_thresholds)
+        self._markup_factors_np = np.array(self._markup_factors)
+        self._packaging_thresholds_np = np.asarray(self._packaging_thresholds)
+        self._packaging_prices_np = np.array(self._packaging_prices)
+        self._batch_ready = True
+
+    def compute_quote_batch(
+        self,
+        volumes_ml: Sequence[float],
+        material_names: Sequence[str],
+        type_piece_names: Sequence[str],
+        typology_names: Sequence[str],
+        quantities: Sequence[int] | int = 1,
+        shipping_method: str = 'retrait',
+        largest_dimensions_mm: Optional[Sequence[float]] = None,
+    ) -> Dict[str, 'np.ndarray']:
+        """Compute quotes for many parts at once with NumPy.
+
+        This is the vectorized counterpart of :meth:`compute_quote` for
+        batch pricing (multi-part orders, pricing sweeps): material
+        prices, type factors, support percentages and the markup and
+        packaging step functions are broadcast over the whole batch in C
+        loops instead of looping one part at a time in Python.
+
+        Args:
+            volumes_ml: Per-part volumes in millilitres.
+            material_names: Material name for each part.
+            type_piece_names: Type de pièce for each part.
+            typology_names: Typology for each part.
+            quantities: Quantity per part (scalar broadcasts to all).
+            shipping_method: 'retrait' or 'livraison', applied to all parts.
+            largest_dimensions_mm: Optional largest dimension per part for
+                the speed-based print time estimate.
+
+        Returns:
+            A dictionary with the same keys as :meth:`compute_quote`, each
+            mapping to an array aligned with the input sequences.
+        """
+        import numpy as np
+
+        if not self._batch_ready:
+            self._build_batch_arrays()
+        volumes = np.asarray(volumes_ml, dtype=np.float64)
+        quantities_arr = np.maximum(np.broadcast_to(np.asarray(quantities, dtype=np.float64), volumes.shape), 1.0)
+        def _material_indices():
+            for n in material_names:
+                try:
+                    yield self._mat_idx[n]
+                except KeyError:
+                    raise ValueError(f"Unknown material: {n}") from None
+
+        mat_idx = np.fromiter(_material_indices(), dtype=np.int32, count=len(volumes))
+        type_idx = np.fromiter((self._type_idx.get(n, -1) for n in type_piece_names), dtype=np.int32, count=len(volumes))
+        typo_idx = np.fromiter((self._typology_idx.get(n, -1) for n in typology_names), dtype=np.int32, count=len(volumes))
+        price_ml = self._mat_price[mat_idx]
+        support_pct = self._mat_support[mat_idx]
+        # Unknown type/typology names fall back to the scalar-path defaults
+        # (factor 1.0, bag price 0.0)
+        type_factor = np.where(type_idx >= 0, self._type_factor_arr[type_idx], 1.0)
+        bag_price = np.where(typo_idx >= 0, self._typology_bag[typo_idx], 0.0)
+        eff_volume = volumes * quantities_arr
+        volume_with_supports = eff_volume * (1.0 + support_pct / 100.0)
+        material_cost = volume_with_supports * price_ml * type_factor
+        if largest_dimensions_mm is not None:
+            speed_mm_s = self._mat_speed[mat_idx] / 10.0
+            dims = np.asarray(largest_dimensions_mm, dtype=np.float64)
+            machine_time_hours = (dims * self.time_factor) / speed_mm_s / 3600.0
+        else:
+            machine_time_hours = volume_with_supports * self.machine_time_per_ml * type_factor
+        machine_cost = machine_time_hours * self.machine_hour_rate
+        base_cost = material_cost + machine_cost
+        post_cost = base_cost * self.post_rate
+        finish_cost = base_cost * self.finish_rate
+        painting_cost = np.zeros_like(base_cost)
+        total_cost_before_markup = base_cost + post_cost + finish_cost
+        # Vectorized step-function lookups (same transform as the bisect
+        # rewrite of the scalar methods)
+        mi = np.searchsorted(self._markup_thresholds_np, eff_volume, side='right') - 1
+        markup_factor = np.where(mi >= 0, self._markup_factors_np[np.maximum(mi, 0)], 1.0)
         price_ht_plate = total_cost_before_markup * markup_factor
-        # Packaging and bag costs
-        packaging_cost = self._get_packaging_cost(eff_volume_ml)
-        bag_cost = bag_price * quantity
-        # Shipping cost
-        shipping_cost = self.shipping_retrait if shipping_method == 'retrait' else self.shipping_delivery
-        # Total HT
+        pi = np.searchsorted(self._packaging_thresholds_np, eff_volume, side='right') - 1
+        packaging_cost = np.where(pi >= 0, self._packaging_prices_np[np.maximum(pi, 0)], 0.0)
+        bag_cost = bag_price * quantities_arr
+        shipping = self.shipping_retrait if shipping_method == 'retrait' else self.shipping_delivery
+        shipping_cost = np.full_like(base_cost, shipping)
         total_ht = price_ht_plate + packaging_cost + bag_cost + shipping_cost
-        # VAT
         vat = total_ht * self.tva_rate
         total_ttc = total_ht + vat
-        # Print time in minutes
         print_time_minutes = machine_time_hours * 60.0
         return {
             'material_cost': material_cost,
@@ -357,6 +747,39 @@ class QuoteEngine:
             'total_ht': total_ht,
             'vat': vat,
             'total_ttc': total_ttc,
-            'volume_with_supports_ml': volume_with_supports_ml,
+            'volume_with_supports_ml': volume_with_supports,
             'print_time_minutes': print_time_minutes,
         }
+
+
+# Memoization for compute_quote. Engines are tracked through a weak
+# registry keyed on a monotonically increasing token: rebuilding the
+# engine after an Excel change gets a token never seen before, so stale
+# entries for the old engine can never be hit again.
+_engine_tokens = itertools.count()
+_engine_refs: 'weakref.WeakValueDictionary[int, QuoteEngine]' = weakref.WeakValueDictionary()
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_quote(
+    engine_id: int,
+    volume_ml: float,
+    material_name: str,
+    type_piece_name: str,
+    typology_name: str,
+    quantity: int,
+    shipping_method: str,
+    add_painting: bool,
+    largest_dimension_mm: Optional[float],
+) -> Dict[str, float]:
+    engine = _engine_refs[engine_id]
+    return engine._compute_quote_impl(
+        volume_ml=volume_ml,
+        material_name=material_name,
+        type_piece_name=type_piece_name,
+        typology_name=typology_name,
+        quantity=quantity,
+        shipping_method=shipping_method,
+        add_painting=add_painting,
+        largest_dimension_mm=largest_dimension_mm,
+    )
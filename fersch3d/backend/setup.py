@@ -0,0 +1,30 @@
+"""
+Build script for the optional native STL kernel.
+
+Run from this directory:
+
+    python setup.py build_ext --inplace
+
+Requires Cython and a C compiler. The backend works without the
+extension; :mod:`stl_volume` falls back to its NumPy/pure-Python paths
+when the import fails.
+
+Author: Fersch 3D quoting engine
+"""
+
+from setuptools import Extension, setup
+
+from Cython.Build import cythonize
+
+extensions = [
+    Extension(
+        "_stl_kernel",
+        ["_stl_kernel.pyx"],
+        extra_compile_args=["-O3", "-ffast-math", "-march=native"],
+    )
+]
+
+setup(
+    name="fersch3d-stl-kernel",
+    ext_modules=cythonize(extensions, language_level=3),
+)
@@ -24,34 +24,162 @@ Author: Fersch 3D quoting engine
 
 from __future__ import annotations
 
+import logging
+import mmap
+import os
+import re
 import struct
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Iterable, Tuple
 
+try:  # NumPy is optional; parsing falls back to pure Python without it
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on environment
+    np = None
 
-def parse_ascii_vertices(lines: Iterable[str]) -> Iterable[Tuple[float, float, float]]:
-    """Yield vertex coordinates from an ASCII STL iterator.
+try:  # Numba is optional; without it the einsum pipeline is used
+    import numba
+except ImportError:  # pragma: no cover - depends on environment
+    numba = None
+
+try:  # Compiled kernel; built from _stl_kernel.pyx via setup.py
+    from . import _stl_kernel
+except ImportError:  # pragma: no cover - extension not built
+    _stl_kernel = None
+
+try:  # Hyperscan is optional; without it the re module scans ASCII files
+    import hyperscan
+except ImportError:  # pragma: no cover - depends on environment
+    hyperscan = None
+
+logger = logging.getLogger(__name__)
+
+# JIT'd streaming DFA for the vertex keyword scan; ~GB/s on large ASCII
+# files versus the backtracking re engine. SOM_LEFTMOST is required to
+# recover the match start offsets for token extraction.
+_HS_DB = None
+if hyperscan is not None:  # pragma: no cover - depends on environment
+    try:
+        _HS_DB = hyperscan.Database()
+        _HS_DB.compile(
+            expressions=[rb"vertex\s+\S+\s+\S+\s+\S+"],
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST],
+        )
+    except Exception:
+        _HS_DB = None
+
+
+# Captures the three coordinate tokens of a "vertex x y z" line
+_VERTEX_RE = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)", re.IGNORECASE)
+
+# One 50-byte facet record: pad bytes skip the normal and attribute
+# fields. Precompiled once so the format string is never reparsed.
+_FACET = struct.Struct("<12x9f2x")
+
+
+def _ascii_facets_array(data) -> "np.ndarray | None":
+    """Bulk-decode ASCII STL vertices into an ``(N, 3, 3)`` float array.
+
+    A single regex scan over the raw bytes collects every coordinate
+    triple, and one ``np.array`` call converts them all at C level,
+    replacing the per-line ``strip``/``startswith``/``float`` work of
+    :func:`parse_ascii_vertices`.
+
+    Args:
+        data: The raw file contents (bytes or a memory map).
+
+    Returns:
+        The facet array, or ``None`` when a coordinate token cannot be
+        parsed so the caller can fall back to the line parser.
+    """
+    matches = None
+    if _HS_DB is not None:  # pragma: no cover - depends on environment
+        matches = _hyperscan_vertex_tokens(data)
+    if matches is None:
+        matches = _VERTEX_RE.findall(data)
+    n = len(matches) // 3
+    try:
+        verts = np.array(matches[: n * 3], dtype=np.float64)
+    except ValueError:
+        return None
+    return verts.reshape(-1, 3, 3)
+
+
+def _iter_lines(data) -> Iterable[bytes]:
+    """Yield raw lines from a memory map or bytes buffer.
+
+    A memory map is read with ``readline`` so only the touched pages are
+    resident, instead of materialising the decoded text and a list of
+    lines for the whole file at once.
+    """
+    if isinstance(data, mmap.mmap):
+        data.seek(0)
+        while line := data.readline():
+            yield line
+    else:
+        yield from data.splitlines(keepends=True)
+
+
+def _hyperscan_vertex_tokens(data) -> "list | None":  # pragma: no cover - requires hyperscan
+    """Collect coordinate token triples with a Hyperscan scan.
+
+    Hyperscan reports a match at *every* end offset the greedy pattern
+    can reach, so one vertex line produces a span per character of the
+    final coordinate. Only the longest end per start offset is the full
+    ``vertex x y z`` match; shorter ones are truncated prefixes.
+
+    Returns:
+        The token triples in file order, or ``None`` when any surviving
+        span does not split into exactly four tokens, so the caller can
+        fall back to the re-based scan.
+    """
+    spans: dict = {}
+
+    def on_match(expr_id, start, end, flags, context):
+        prev = spans.get(start)
+        if prev is None or end > prev:
+            spans[start] = end
+
+    buf = data if isinstance(data, (bytes, bytearray)) else data[:]
+    _HS_DB.scan(buf, match_event_handler=on_match)
+    triples = []
+    for start in sorted(spans):
+        parts = buf[start : spans[start]].split()
+        if len(parts) != 4:
+            return None
+        triples.append((parts[1], parts[2], parts[3]))
+    return triples
+
+
+def parse_ascii_vertices(lines: Iterable[bytes]) -> Iterable[Tuple[float, float, float]]:
+    """Yield vertex coordinates from an ASCII STL line iterator.
 
     Each "vertex" line is expected to contain three floating point
     coordinates separated by whitespace. Other lines are ignored.
 
     Args:
-        lines: An iterable of strings representing the file contents.
+        lines: An iterable of bytes lines representing the file contents.
 
     Yields:
         Tuples of (x, y, z) floats for each vertex.
     """
     for line in lines:
-        line = line.strip()
-        if line.lower().startswith("vertex"):
-            parts = line.split()
-            # vertex lines typically look like: vertex x y z
-            try:
-                x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                yield (x, y, z)
-            except (IndexError, ValueError):
-                # Skip malformed vertex lines
-                continue
+        line = line.lstrip()
+        # Case-fold only the 6-byte prefix — a fixed-size allocation
+        # instead of the whole-line .lower() copy — so mixed-case
+        # keywords match here just like in the IGNORECASE regex path
+        if line[:6].lower() != b"vertex":
+            continue
+        parts = line.split()
+        # vertex lines typically look like: vertex x y z
+        try:
+            x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
+            yield (x, y, z)
+        except (IndexError, ValueError):
+            # Skip malformed vertex lines
+            continue
 
 
 def parse_binary_facets(data: bytes) -> Iterable[Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]]]:
@@ -73,16 +201,209 @@ def parse_binary_facets(data: bytes) -> Iterable[Tuple[Tuple[float, float, float
     Yields:
         Triples of vertex coordinates (v1, v2, v3).
     """
-    facet_size = 50  # bytes per facet (12 normal + 3*12 vertices + 2 attr)
-    for i in range(0, len(data), facet_size):
-        chunk = data[i : i + facet_size]
-        if len(chunk) < facet_size:
-            break
-        # Skip normal vector (first 12 bytes)
-        v1 = struct.unpack("<3f", chunk[12:24])
-        v2 = struct.unpack("<3f", chunk[24:36])
-        v3 = struct.unpack("<3f", chunk[36:48])
-        yield (v1, v2, v3)
+    facet_size = _FACET.size  # 50 bytes: 12 normal + 3*12 vertices + 2 attr
+    unpack_from = _FACET.unpack_from
+    # unpack_from walks the buffer by integer offset: no trimming slice
+    # of the payload and no per-facet bytes objects
+    for offset in range(0, len(data) - facet_size + 1, facet_size):
+        f = unpack_from(data, offset)
+        yield ((f[0], f[1], f[2]), (f[3], f[4], f[5]), (f[6], f[7], f[8]))
+
+
+def _open_stl_buffer(path: Path) -> Tuple[bytes | mmap.mmap, mmap.mmap | None, int]:
+    """Open *path* as a read-only buffer, preferring a memory map.
+
+    Memory-mapping lets the OS demand-page facet bytes as they are
+    consumed instead of copying the whole file into a fresh ``bytes``
+    object up front. Empty files and platforms where the map cannot be
+    created fall back to :meth:`Path.read_bytes`.
+
+    Args:
+        path: Path to the STL file.
+
+    Returns:
+        A tuple ``(data, mm, fd)``. ``mm`` and ``fd`` are ``None`` and
+        ``-1`` when the fallback was taken and nothing needs closing.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return path.read_bytes(), None, -1
+    try:
+        if hasattr(mmap, "PROT_READ"):
+            mm = mmap.mmap(fd, 0, prot=mmap.PROT_READ)
+        else:  # pragma: no cover - Windows has no PROT_READ
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        os.close(fd)
+        return path.read_bytes(), None, -1
+    return mm, mm, fd
+
+
+def _binary_facet_streams(data: bytes, num_triangles: int) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Decode binary STL facets into three contiguous ``(N, 3)`` streams.
+
+    A structured dtype with explicit byte offsets maps the 50-byte facet
+    records directly, so the whole payload is decoded in a single
+    :func:`numpy.frombuffer` call instead of three ``struct.unpack``
+    calls per facet. The strided fields are then copied once into
+    contiguous float32 arrays: the on-disk layout is AoS with a 2-byte
+    misalignment, and this single O(N) transpose turns every downstream
+    reduction into unit-stride passes that SIMD and the hardware
+    prefetcher handle at full throughput.
+
+    Args:
+        data: The full file contents (header included).
+        num_triangles: Triangle count from the binary header.
+
+    Returns:
+        A tuple ``(v1, v2, v3)`` of contiguous ``(N, 3)`` float32 arrays.
+    """
+    dt = np.dtype(
+        {
+            "names": ["v1", "v2", "v3"],
+            "formats": ["<3f4", "<3f4", "<3f4"],
+            "offsets": [12, 24, 36],
+            "itemsize": 50,
+        }
+    )
+    count = min(num_triangles, (len(data) - 84) // 50)
+    arr = np.frombuffer(data, dtype=dt, count=count, offset=84)
+    return (
+        np.ascontiguousarray(arr["v1"]),
+        np.ascontiguousarray(arr["v2"]),
+        np.ascontiguousarray(arr["v3"]),
+    )
+
+
+# Facets per einsum block; bounds the cross-product temporary and the
+# float32 rounding error of each partial sum
+_VOLUME_BLOCK = 4096
+
+
+def _signed_volume_sum(v1: "np.ndarray", v2: "np.ndarray", v3: "np.ndarray") -> float:
+    """Sum the signed tetrahedron volumes of every facet.
+
+    ``np.einsum`` contracts the per-facet dot product of ``v1`` with
+    ``v2 × v3``, replacing the per-facet calls to
+    :func:`signed_tetrahedron_volume`. The contraction runs block-wise in
+    the input dtype (float32 for binary files), and each partial sum is
+    promoted into a float64 running total, so memory traffic stays at
+    float32 width without the accumulation error of one long float32 sum.
+
+    Args:
+        v1, v2, v3: Vertex arrays of shape ``(N, 3)``.
+
+    Returns:
+        The total signed volume in cubic millimetres.
+    """
+    total = 0.0
+    for start in range(0, len(v1), _VOLUME_BLOCK):
+        end = start + _VOLUME_BLOCK
+        cross = np.cross(v2[start:end], v3[start:end])
+        total += float(np.einsum("ij,ij->", v1[start:end], cross))
+    return total / 6.0
+
+
+if np is not None and numba is not None:
+
+    @numba.njit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+    def _fused_volume_bbox(v1, v2, v3):  # pragma: no cover - requires numba
+        """Fused single-pass volume and bounding-box reduction.
+
+        One streaming loop over the contiguous float32 vertex streams
+        accumulates the signed volume and the six bounds together,
+        avoiding the ``(N, 3)`` cross-product temporary of the einsum
+        pipeline. The loop runs under ``numba.prange``; every accumulator
+        follows the ``acc = op(acc, x)`` shape Numba recognizes as a
+        parallel reduction, so cores stream disjoint facet chunks
+        concurrently.
+        """
+        vol = 0.0
+        min_x = min_y = min_z = np.inf
+        max_x = max_y = max_z = -np.inf
+        for i in numba.prange(v1.shape[0]):
+            ax, ay, az = v1[i, 0], v1[i, 1], v1[i, 2]
+            bx, by, bz = v2[i, 0], v2[i, 1], v2[i, 2]
+            cx, cy, cz = v3[i, 0], v3[i, 1], v3[i, 2]
+            # v1 . (v2 x v3)
+            vol += (
+                ax * (by * cz - bz * cy)
+                + ay * (bz * cx - bx * cz)
+                + az * (bx * cy - by * cx)
+            )
+            min_x = min(min_x, min(ax, min(bx, cx)))
+            min_y = min(min_y, min(ay, min(by, cy)))
+            min_z = min(min_z, min(az, min(bz, cz)))
+            max_x = max(max_x, max(ax, max(bx, cx)))
+            max_y = max(max_y, max(ay, max(by, cy)))
+            max_z = max(max_z, max(az, max(bz, cz)))
+        return vol / 6.0, min_x, min_y, min_z, max_x, max_y, max_z
+
+else:
+    _fused_volume_bbox = None
+
+
+def warm_up() -> None:
+    """Initialize the JIT kernels from the calling thread.
+
+    The Numba parallel runtime must be started on the main thread: if
+    its first use happens on a worker thread (as ``asyncio.to_thread``
+    does in serve mode), the process hangs at interpreter shutdown and
+    never honours SIGTERM. Call this once at startup, before volume
+    computations are offloaded to threads. A no-op without numba; kernel
+    failures are swallowed since the call paths have their own
+    fallbacks.
+    """
+    if _fused_volume_bbox is None:
+        return
+    dummy = np.zeros((1, 3), dtype=np.float32)
+    try:
+        _fused_volume_bbox(dummy, dummy, dummy)
+    except Exception:  # pragma: no cover - requires numba
+        pass
+
+
+def _volume_and_bbox_from_streams(
+    v1: "np.ndarray", v2: "np.ndarray", v3: "np.ndarray"
+) -> Tuple[float, float, float, float, float, float, float]:
+    """Shared vectorized reduction for ASCII and binary facets.
+
+    Both branches end up with three ``(N, 3)`` vertex arrays; this single
+    entry point dispatches to the fused Numba kernel when available and
+    otherwise runs the block-wise einsum plus axis-wise min/max passes,
+    so format-specific code stops at decoding.
+
+    Args:
+        v1, v2, v3: Vertex arrays of shape ``(N, 3)``, N ≥ 1.
+
+    Returns:
+        ``(volume_mm3, min_x, min_y, min_z, max_x, max_y, max_z)``.
+    """
+    if _fused_volume_bbox is not None:
+        try:
+            return _fused_volume_bbox(v1, v2, v3)
+        except Exception:
+            # A stale on-disk JIT cache (cache=True, written when this
+            # module was imported under a different name) raises from
+            # inside the dispatcher instead of recompiling; degrade to
+            # the einsum path like the other optional accelerators
+            logger.warning(
+                "Numba STL kernel failed, falling back to einsum path",
+                exc_info=True,
+            )
+    total = _signed_volume_sum(v1, v2, v3)
+    mins = np.minimum(np.minimum(v1.min(axis=0), v2.min(axis=0)), v3.min(axis=0))
+    maxs = np.maximum(np.maximum(v1.max(axis=0), v2.max(axis=0)), v3.max(axis=0))
+    return (
+        total,
+        float(mins[0]),
+        float(mins[1]),
+        float(mins[2]),
+        float(maxs[0]),
+        float(maxs[1]),
+        float(maxs[2]),
+    )
 
 
 def signed_tetrahedron_volume(v1: Tuple[float, float, float], v2: Tuple[float, float, float], v3: Tuple[float, float, float]) -> float:
@@ -113,9 +434,20 @@ def compute_volume_ml(file_path: str | Path) -> float:
     return volume_ml
 
 
+# Parsed results keyed on (path, mtime_ns, size); a stat call is a few
+# hundred nanoseconds versus a full re-parse on repeated quotes
+_VOLUME_CACHE_MAX = 256
+_volume_cache: "OrderedDict[Tuple[str, int, int], Tuple[float, Tuple[float, float, float]]]" = OrderedDict()
+_volume_cache_lock = threading.Lock()
+
+
 def compute_volume_and_bbox(file_path: str | Path) -> Tuple[float, Tuple[float, float, float]]:
     """Compute the volume (ml) and bounding box dimensions (mm) of an STL file.
 
+    Results are cached per ``(path, mtime_ns, size)``, so quoting the
+    same uploaded file twice only pays for one parse. Use
+    ``compute_volume_and_bbox.cache_clear()`` to reset the cache.
+
     Args:
         file_path: Path to the STL file.
 
@@ -125,49 +457,152 @@ def compute_volume_and_bbox(file_path: str | Path) -> Tuple[float, Tuple[float,
         extents of the model along the x, y and z axes respectively.
     """
     path = Path(file_path)
-    data = path.read_bytes()
-    is_ascii = data[:5].lower() == b"solid" and b"facet" in data[:200]
-    total_volume_mm3 = 0.0
-    # Initialize bounding box
-    min_x = min_y = min_z = float("inf")
-    max_x = max_y = max_z = float("-inf")
-    if is_ascii:
-        lines = data.decode("utf-8", errors="ignore").splitlines()
-        vertices = []
-        for v in parse_ascii_vertices(lines):
-            # Update bounds
-            x, y, z = v
-            min_x = min(min_x, x)
-            min_y = min(min_y, y)
-            min_z = min(min_z, z)
-            max_x = max(max_x, x)
-            max_y = max(max_y, y)
-            max_z = max(max_z, z)
-            vertices.append(v)
-            if len(vertices) == 3:
-                v1, v2, v3 = vertices
-                total_volume_mm3 += signed_tetrahedron_volume(v1, v2, v3)
-                vertices = []
-    else:
-        if len(data) < 84:
-            return 0.0, (0.0, 0.0, 0.0)
-        num_triangles = struct.unpack("<I", data[80:84])[0]
-        facets_data = data[84:]
-        count = 0
-        for v1, v2, v3 in parse_binary_facets(facets_data):
-            # Update bounds for each vertex
-            for v in (v1, v2, v3):
-                x, y, z = v
-                min_x = min(min_x, x)
-                min_y = min(min_y, y)
-                min_z = min(min_z, z)
-                max_x = max(max_x, x)
-                max_y = max(max_y, y)
-                max_z = max(max_z, z)
-            total_volume_mm3 += signed_tetrahedron_volume(v1, v2, v3)
-            count += 1
-            if count >= num_triangles:
-                break
+    try:
+        st = os.stat(path)
+        key = (str(path), st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    if key is not None:
+        with _volume_cache_lock:
+            cached = _volume_cache.get(key)
+            if cached is not None:
+                _volume_cache.move_to_end(key)
+                return cached
+    result = _compute_volume_and_bbox(path)
+    if key is not None:
+        with _volume_cache_lock:
+            _volume_cache[key] = result
+            _volume_cache.move_to_end(key)
+            while len(_volume_cache) > _VOLUME_CACHE_MAX:
+                _volume_cache.popitem(last=False)
+    return result
+
+
+def _clear_volume_cache() -> None:
+    """Drop all cached parse results."""
+    with _volume_cache_lock:
+        _volume_cache.clear()
+
+
+compute_volume_and_bbox.cache_clear = _clear_volume_cache  # type: ignore[attr-defined]
+
+
+def _compute_volume_and_bbox(path: Path) -> Tuple[float, Tuple[float, float, float]]:
+    """Parse *path* and compute its volume and bounding box (uncached)."""
+    # LOAD_FAST instead of LOAD_GLOBAL in the per-vertex fallback loops
+    _min = min
+    _max = max
+    data, mm, fd = _open_stl_buffer(path)
+    try:
+        # Exact length arithmetic is the unambiguous binary signature
+        # (84-byte header plus 50 bytes per facet); the "solid" prefix
+        # alone is not, since some binary exporters write it too.
+        is_binary = False
+        if len(data) >= 84:
+            num_header_triangles = struct.unpack_from("<I", data, 80)[0]
+            is_binary = len(data) == 84 + 50 * num_header_triangles
+        is_ascii = not is_binary and data[:5].lower() == b"solid"
+        total_volume_mm3 = 0.0
+        # Initialize bounding box
+        min_x = min_y = min_z = float("inf")
+        max_x = max_y = max_z = float("-inf")
+        if is_ascii:
+            verts = _ascii_facets_array(data) if np is not None else None
+            if verts is not None:
+                if len(verts):
+                    (
+                        total_volume_mm3,
+                        min_x,
+                        min_y,
+                        min_z,
+                        max_x,
+                        max_y,
+                        max_z,
+                    ) = _volume_and_bbox_from_streams(
+                        verts[:, 0], verts[:, 1], verts[:, 2]
+                    )
+            else:
+                # Rotate through three scalar slots instead of growing
+                # and resetting a list for every triangle
+                idx = 0
+                v1 = v2 = None
+                for v in parse_ascii_vertices(_iter_lines(data)):
+                    # Update bounds
+                    x, y, z = v
+                    min_x = _min(min_x, x)
+                    min_y = _min(min_y, y)
+                    min_z = _min(min_z, z)
+                    max_x = _max(max_x, x)
+                    max_y = _max(max_y, y)
+                    max_z = _max(max_z, z)
+                    if idx == 0:
+                        v1 = v
+                        idx = 1
+                    elif idx == 1:
+                        v2 = v
+                        idx = 2
+                    else:
+                        total_volume_mm3 += signed_tetrahedron_volume(v1, v2, v)
+                        idx = 0
+        else:
+            if len(data) < 84:
+                return 0.0, (0.0, 0.0, 0.0)
+            num_triangles = struct.unpack("<I", data[80:84])[0]
+            if num_triangles == 0:
+                # Degenerate file: skip the decode pipeline entirely
+                return 0.0, (0.0, 0.0, 0.0)
+            if len(data) < 84 + 50 * num_triangles:
+                logger.warning(
+                    "Binary STL %s declares %d facets but holds only %d "
+                    "bytes; parsing the available prefix",
+                    path,
+                    num_triangles,
+                    len(data),
+                )
+            if _stl_kernel is not None:
+                count = min(num_triangles, (len(data) - 84) // 50)
+                if count:
+                    (
+                        total_volume_mm3,
+                        min_x,
+                        min_y,
+                        min_z,
+                        max_x,
+                        max_y,
+                        max_z,
+                    ) = _stl_kernel.volume_and_bbox(data, count)
+            elif np is not None:
+                v1s, v2s, v3s = _binary_facet_streams(data, num_triangles)
+                if len(v1s):
+                    (
+                        total_volume_mm3,
+                        min_x,
+                        min_y,
+                        min_z,
+                        max_x,
+                        max_y,
+                        max_z,
+                    ) = _volume_and_bbox_from_streams(v1s, v2s, v3s)
+            else:
+                # Slice to the declared facet count up-front: no per-facet
+                # bounds check, and trailing garbage bytes are ignored
+                facets_data = data[84 : 84 + 50 * num_triangles]
+                for v1, v2, v3 in parse_binary_facets(facets_data):
+                    # Update bounds for each vertex
+                    for v in (v1, v2, v3):
+                        x, y, z = v
+                        min_x = _min(min_x, x)
+                        min_y = _min(min_y, y)
+                        min_z = _min(min_z, z)
+                        max_x = _max(max_x, x)
+                        max_y = _max(max_y, y)
+                        max_z = _max(max_z, z)
+                    total_volume_mm3 += signed_tetrahedron_volume(v1, v2, v3)
+    finally:
+        if mm is not None:
+            mm.close()
+        if fd >= 0:
+            os.close(fd)
     volume_ml = abs(total_volume_mm3) / 1000.0
     # Compute dimensions
     length = max_x - min_x if max_x > min_x else 0.0